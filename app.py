@@ -1495,13 +1495,28 @@
 
 
 from datetime import timezone
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+import bisect
+import functools
+import hashlib
 import os
 import csv
 import io
+import queue
+import threading
+import time
+import orjson
+import polyline
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import psycopg2
-from psycopg2.extras import RealDictCursor
-from flask import Flask, request, jsonify, render_template_string, Response
+from psycopg2.extras import RealDictCursor, execute_values
+from psycopg2.pool import ThreadedConnectionPool
+from flask import Flask, request, render_template, Response, stream_with_context
+from flask_compress import Compress
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -1523,26 +1538,183 @@ TOMTOM_TRAFFIC_TILE_URL = os.getenv(
 )
 
 app = Flask(__name__)
+Compress(app)
+
+
+def _make_session():
+    """Keep-alive session so TCP+TLS handshakes are paid once per host."""
+    s = requests.Session()
+    s.headers["Accept-Encoding"] = "gzip"
+    s.mount(
+        "https://",
+        HTTPAdapter(
+            pool_connections=20,
+            pool_maxsize=50,
+            max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=[502, 503, 504]),
+        ),
+    )
+    return s
+
+
+TOMTOM_SESS = _make_session()
+OWM_SESS = _make_session()
+
+
+def ojsonify(obj):
+    """orjson-backed stand-in for flask.jsonify (faster dumps, less GC)."""
+    return Response(
+        orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY),
+        mimetype="application/json",
+    )
+
+
+def _etag_matches(etag):
+    """True if the request's If-None-Match covers the given tag.
+
+    Flask-Compress rewrites outgoing ETags to "<tag>:<encoding>" when it
+    compresses a response, and the browser echoes that rewritten value
+    back, so a plain string compare never matches. Accept both the bare
+    tag and any compression-suffixed variant of it.
+    """
+    if request.if_none_match.contains(etag):
+        return True
+    return any(t.rsplit(":", 1)[0] == etag for t in request.if_none_match)
+
+# Shared pool for fanning out the independent upstream API calls
+# (weather / AQI / traffic) instead of paying three round trips in a row.
+_API_POOL = ThreadPoolExecutor(max_workers=8)
+
+
+# ---------------------------
+# In-process TTL cache (upstream API helpers + slow aggregates)
+# ---------------------------
+_CACHE_LOCK = threading.Lock()
+_CACHE = {}  # key -> (expires_at, value)
+_CACHE_MAX = 4096  # entries; suggest/geocode keys are user-controlled strings
+_INFLIGHT = {}  # key -> threading.Lock, one per in-progress upstream call
+
+
+def _cache_evict_locked():
+    """Make room in _CACHE before a new store; caller holds _CACHE_LOCK.
+
+    Without a cap the cache only ever grows: suggest and geocode are
+    keyed on every distinct query, so a long-running worker (or anyone
+    enumerating queries) would inflate it without bound. Drops expired
+    entries first (giving up their stale-fallback value), then whatever
+    is closest to expiry until back under the cap.
+    """
+    now = time.monotonic()
+    for k in [k for k, (exp, _) in _CACHE.items() if exp <= now]:
+        del _CACHE[k]
+    while len(_CACHE) >= _CACHE_MAX:
+        del _CACHE[min(_CACHE, key=lambda k: _CACHE[k][0])]
+
+
+def cached(ttl):
+    """
+    Memoize an upstream helper for `ttl` seconds, keyed on its arguments.
+
+    Popular cities and autocomplete prefixes hit the same TomTom /
+    OpenWeather URLs over and over; a warm hit costs a dict lookup
+    instead of a 100-500 ms HTTPS round trip (and third-party quota).
+    If the upstream call raises and a stale entry exists, the stale
+    value is served instead of failing the request.
+    """
+
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = (fn.__name__, args, tuple(sorted(kwargs.items())))
+            with _CACHE_LOCK:
+                hit = _CACHE.get(key)
+            if hit is not None and hit[0] > time.monotonic():
+                return hit[1]
+            # Singleflight: concurrent misses on the same key queue on a
+            # per-key lock so only one upstream request is issued; the
+            # others pick the fresh value out of the cache when it lands.
+            with _CACHE_LOCK:
+                gate = _INFLIGHT.setdefault(key, threading.Lock())
+            with gate:
+                with _CACHE_LOCK:
+                    hit = _CACHE.get(key)
+                if hit is not None and hit[0] > time.monotonic():
+                    return hit[1]
+                try:
+                    value = fn(*args, **kwargs)
+                except Exception:
+                    if hit is not None:
+                        return hit[1]  # stale fallback on upstream failure
+                    raise
+                finally:
+                    with _CACHE_LOCK:
+                        _INFLIGHT.pop(key, None)
+                with _CACHE_LOCK:
+                    if key not in _CACHE and len(_CACHE) >= _CACHE_MAX:
+                        _cache_evict_locked()
+                    _CACHE[key] = (time.monotonic() + ttl, value)
+                return value
+
+        return wrapper
+
+    return deco
 
 
 # ---------------------------
 # DB helpers + auto-create table
 # ---------------------------
+_PG_POOL = None
+_PG_POOL_LOCK = threading.Lock()
+
+
+def _pg_pool():
+    """Process-wide connection pool, created lazily on first use."""
+    global _PG_POOL
+    if _PG_POOL is None:
+        # Double-checked under a lock (same pattern as cached()): with
+        # threaded workers, racing first requests would each build a
+        # pool and leak the losers' open connections.
+        with _PG_POOL_LOCK:
+            if _PG_POOL is None:
+                if DATABASE_URL:
+                    _PG_POOL = ThreadedConnectionPool(
+                        minconn=2, maxconn=25, dsn=DATABASE_URL
+                    )
+                else:
+                    _PG_POOL = ThreadedConnectionPool(
+                        minconn=2,
+                        maxconn=25,
+                        host=PG_HOST,
+                        port=PG_PORT,
+                        dbname=PG_DB,
+                        user=PG_USER,
+                        password=PG_PASSWORD,
+                    )
+    return _PG_POOL
+
+
+@contextmanager
 def db_conn():
     """
-    Prefer DATABASE_URL for Render.
-    Fallback to split PG_* variables for local development.
+    Borrow a pooled connection instead of opening a fresh one per call.
+
+    Prefers DATABASE_URL for Render, falls back to split PG_* variables
+    for local development. Commits on success, rolls back on error, and
+    always returns the connection to the pool.
+
+    Every block is one self-contained transaction with no session-level
+    state, so PG_HOST/PG_PORT may point at PgBouncer in transaction
+    pooling mode (see README) for multi-worker deployments.
     """
-    if DATABASE_URL:
-        return psycopg2.connect(DATABASE_URL)
-
-    return psycopg2.connect(
-        host=PG_HOST,
-        port=PG_PORT,
-        dbname=PG_DB,
-        user=PG_USER,
-        password=PG_PASSWORD,
-    )
+    pool = _pg_pool()
+    conn = pool.getconn()
+    try:
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        pool.putconn(conn)
 
 
 def init_db():
@@ -1566,34 +1738,96 @@ def init_db():
                 );
                 """
             )
+            # Covering index: fetch_recent's ORDER BY created_at DESC
+            # LIMIT n becomes an index scan of the newest rows, and
+            # fetch_today_stats' range filter + aggregates become an
+            # index-only scan instead of sweeping the whole table.
+            cur.execute(
+                """
+                CREATE INDEX IF NOT EXISTS ix_gsh_created_at_desc
+                ON geo_search_history (created_at DESC)
+                INCLUDE (temperature_c, aqi, traffic_speed_kmh);
+                """
+            )
         conn.commit()
 
 
-def save_to_db(query_text, place, lat, lon, weather, aqi_0_500, traffic):
+def save_to_db_many(rows):
+    """
+    Insert many history tuples in one round trip via execute_values.
+
+    Each row is (query_text, place_name, lat, lon, temperature_c,
+    humidity_pct, wind_speed_ms, aqi, traffic_speed_kmh).
+    """
+    if not rows:
+        return
     init_db()
     with db_conn() as conn:
         with conn.cursor() as cur:
-            cur.execute(
+            execute_values(
+                cur,
                 """
                 INSERT INTO geo_search_history
                 (query_text, place_name, lat, lon, temperature_c, humidity_pct, wind_speed_ms, aqi, traffic_speed_kmh)
-                VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s)
+                VALUES %s
                 """,
-                (
-                    query_text,
-                    place,
-                    lat,
-                    lon,
-                    weather.get("temperature_c"),
-                    weather.get("humidity_pct"),
-                    weather.get("wind_speed_ms"),
-                    aqi_0_500,
-                    (traffic or {}).get("currentSpeed_kmh"),
-                ),
+                rows,
+                page_size=100,
             )
         conn.commit()
 
 
+# Write-behind queue: the search response no longer waits on the
+# INSERT. A daemon thread drains queued rows and bulk-inserts them in
+# small batches (up to 50 rows or 100 ms, whichever comes first).
+_WRITE_Q = queue.Queue(maxsize=10_000)
+
+
+def _history_drainer():
+    while True:
+        batch = [_WRITE_Q.get()]
+        t0 = time.monotonic()
+        while len(batch) < 50 and time.monotonic() - t0 < 0.1:
+            try:
+                batch.append(_WRITE_Q.get_nowait())
+            except queue.Empty:
+                time.sleep(0.005)
+        try:
+            save_to_db_many(batch)
+        except Exception:
+            app.logger.exception("history write-behind batch failed")
+
+
+threading.Thread(target=_history_drainer, daemon=True, name="history-writer").start()
+
+
+def save_to_db(query_text, place, lat, lon, weather, aqi_0_500, traffic):
+    row = (
+        query_text,
+        place,
+        lat,
+        lon,
+        weather.temperature_c,
+        weather.humidity_pct,
+        weather.wind_speed_ms,
+        aqi_0_500,
+        traffic.currentSpeed_kmh if traffic else None,
+    )
+    try:
+        _WRITE_Q.put_nowait(row)
+    except queue.Full:
+        save_to_db_many([row])  # backpressure: fall back to a sync write
+
+
+def _iso_utc(dt):
+    """Render a (possibly naive) DB timestamp as a UTC ISO string with Z."""
+    if dt is None:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
 def fetch_recent(limit=20):
     init_db()
     with db_conn() as conn:
@@ -1612,6 +1846,7 @@ def fetch_recent(limit=20):
             return cur.fetchall()
 
 
+@cached(ttl=30)
 def fetch_today_stats():
     init_db()
     with db_conn() as conn:
@@ -1631,15 +1866,62 @@ def fetch_today_stats():
             return cur.fetchone() or {}
 
 
+def _norm_query(q: str) -> str:
+    """
+    Canonicalize a free-form place query for caching.
+
+    Users type many near-duplicates of the same place ("Bengaluru",
+    "bengaluru ", "BENGALURU, India") that all geocode identically but
+    would each miss an exact-string cache. Lower-casing and collapsing
+    whitespace folds them onto one cache entry; geocoders are
+    case-insensitive so the normalized form is safe to send upstream.
+    """
+    return " ".join(q.strip().casefold().split())
+
+
+# Upstream results as slotted dataclasses: parsed once per response,
+# consumed via attribute access instead of repeated .get chains, and
+# fixed-size per cached entry. Field names match the JSON the API
+# endpoints have always emitted.
+@dataclass(slots=True)
+class Weather:
+    temperature_c: float | None = None
+    feels_like_c: float | None = None
+    humidity_pct: float | None = None
+    wind_speed_ms: float | None = None
+    clouds_pct: float | None = None
+    rain_1h_mm: float | None = None
+    weather_main: str | None = None
+    weather_desc: str | None = None
+
+
+@dataclass(slots=True)
+class AqiDetails:
+    aqi_0_500: int | None = None
+    label: str = "—"
+    health_tip: str = "—"
+    components: dict | None = None
+    dominant: str | None = None
+
+
+@dataclass(slots=True)
+class Traffic:
+    currentSpeed_kmh: float | None = None
+    freeFlowSpeed_kmh: float | None = None
+    congestion_ratio: float | None = None
+    congestion_label: str = "—"
+
+
 # ---------------------------
 # TomTom / OpenWeather helpers
 # ---------------------------
+@cached(ttl=86400)
 def tomtom_geocode(query: str):
     url = f"https://api.tomtom.com/search/2/geocode/{requests.utils.quote(query)}.json"
     params = {"key": TOMTOM_API_KEY, "limit": 1}
-    r = requests.get(url, params=params, timeout=20)
+    r = TOMTOM_SESS.get(url, params=params, timeout=20)
     r.raise_for_status()
-    js = r.json()
+    js = orjson.loads(r.content)
     results = js.get("results", [])
     if not results:
         return None
@@ -1650,12 +1932,13 @@ def tomtom_geocode(query: str):
     return place, lat, lon
 
 
+@cached(ttl=86400)
 def tomtom_geocode_any(query: str):
     url = f"https://api.tomtom.com/search/2/geocode/{requests.utils.quote(query)}.json"
     params = {"key": TOMTOM_API_KEY, "limit": 1}
-    r = requests.get(url, params=params, timeout=20)
+    r = TOMTOM_SESS.get(url, params=params, timeout=20)
     r.raise_for_status()
-    js = r.json()
+    js = orjson.loads(r.content)
     results = js.get("results", [])
     if not results:
         return None
@@ -1666,17 +1949,19 @@ def tomtom_geocode_any(query: str):
     return {"place": place, "lat": lat, "lon": lon}
 
 
+@cached(ttl=86400)
 def tomtom_reverse(lat: float, lon: float):
     url = f"https://api.tomtom.com/search/2/reverseGeocode/{lat},{lon}.json"
     params = {"key": TOMTOM_API_KEY, "limit": 1}
-    r = requests.get(url, params=params, timeout=20)
+    r = TOMTOM_SESS.get(url, params=params, timeout=20)
     r.raise_for_status()
-    js = r.json()
+    js = orjson.loads(r.content)
     add = (js.get("addresses") or [{}])[0].get("address", {}) or {}
     place = add.get("freeformAddress") or add.get("municipality") or "My location"
     return place
 
 
+@cached(ttl=1800)
 def tomtom_suggest(query: str, limit: int = 6):
     url = f"https://api.tomtom.com/search/2/search/{requests.utils.quote(query)}.json"
     params = {
@@ -1686,9 +1971,9 @@ def tomtom_suggest(query: str, limit: int = 6):
         "idxSet": "Geo",
         "countrySet": "IN",
     }
-    r = requests.get(url, params=params, timeout=20)
+    r = TOMTOM_SESS.get(url, params=params, timeout=20)
     r.raise_for_status()
-    js = r.json()
+    js = orjson.loads(r.content)
     out = []
     for it in js.get("results", [])[:limit]:
         pos = it.get("position", {}) or {}
@@ -1703,54 +1988,52 @@ def tomtom_suggest(query: str, limit: int = 6):
     return out
 
 
+@cached(ttl=300)
 def openweather_weather(lat: float, lon: float):
     url = "https://api.openweathermap.org/data/2.5/weather"
     params = {"lat": lat, "lon": lon, "appid": OPENWEATHER_API_KEY, "units": "metric"}
-    r = requests.get(url, params=params, timeout=20)
+    r = OWM_SESS.get(url, params=params, timeout=20)
     r.raise_for_status()
-    js = r.json()
+    js = orjson.loads(r.content)
     main = js.get("main", {}) or {}
     wind = js.get("wind", {}) or {}
     clouds = js.get("clouds", {}) or {}
     weather0 = (js.get("weather") or [{}])[0] or {}
     rain = (js.get("rain") or {})
 
-    return {
-        "temperature_c": main.get("temp"),
-        "feels_like_c": main.get("feels_like"),
-        "humidity_pct": main.get("humidity"),
-        "wind_speed_ms": wind.get("speed"),
-        "clouds_pct": clouds.get("all"),
-        "rain_1h_mm": rain.get("1h"),
-        "weather_main": weather0.get("main"),
-        "weather_desc": weather0.get("description"),
-    }
+    return Weather(
+        temperature_c=main.get("temp"),
+        feels_like_c=main.get("feels_like"),
+        humidity_pct=main.get("humidity"),
+        wind_speed_ms=wind.get("speed"),
+        clouds_pct=clouds.get("all"),
+        rain_1h_mm=rain.get("1h"),
+        weather_main=weather0.get("main"),
+        weather_desc=weather0.get("description"),
+    )
 
 
 # ---------------------------
 # AQI 0..500 from PM2.5 + pollutants
 # ---------------------------
+# US EPA PM2.5 breakpoints as parallel tuples: the bucket is found with
+# one bisect on the upper bounds instead of a tuple-unpacking linear scan.
+_BP_CL = (0.0, 12.1, 35.5, 55.5, 150.5, 250.5, 350.5)
+_BP_CH = (12.0, 35.4, 55.4, 150.4, 250.4, 350.4, 500.4)
+_BP_IL = (0, 51, 101, 151, 201, 301, 401)
+_BP_IH = (50, 100, 150, 200, 300, 400, 500)
+
+
 def _aqi_from_pm25_us(pm25_ug_m3: float):
     if pm25_ug_m3 is None:
         return None
-    bps = [
-        (0.0, 12.0, 0, 50),
-        (12.1, 35.4, 51, 100),
-        (35.5, 55.4, 101, 150),
-        (55.5, 150.4, 151, 200),
-        (150.5, 250.4, 201, 300),
-        (250.5, 350.4, 301, 400),
-        (350.5, 500.4, 401, 500),
-    ]
-    c = float(pm25_ug_m3)
-    c = max(0.0, c)
+    c = max(0.0, float(pm25_ug_m3))
     if c > 500.4:
         return 500
-    for cl, ch, il, ih in bps:
-        if cl <= c <= ch:
-            aqi = ((ih - il) / (ch - cl)) * (c - cl) + il
-            return int(round(aqi))
-    return None
+    i = bisect.bisect_left(_BP_CH, c)
+    cl, ch, il, ih = _BP_CL[i], _BP_CH[i], _BP_IL[i], _BP_IH[i]
+    aqi = ((ih - il) / (ch - cl)) * (max(c, cl) - cl) + il
+    return int(round(aqi))
 
 
 def aqi_label_500(a):
@@ -1787,12 +2070,13 @@ def aqi_health_tip(a):
     return "Severe: Stay indoors; use air purifier if available."
 
 
+@cached(ttl=600)
 def openweather_aqi_details(lat: float, lon: float):
     url = "https://api.openweathermap.org/data/2.5/air_pollution"
     params = {"lat": lat, "lon": lon, "appid": OPENWEATHER_API_KEY}
-    r = requests.get(url, params=params, timeout=20)
+    r = OWM_SESS.get(url, params=params, timeout=20)
     r.raise_for_status()
-    js = r.json()
+    js = orjson.loads(r.content)
 
     comp = (js.get("list", [{}])[0] or {}).get("components", {}) or {}
     pm25 = comp.get("pm2_5")
@@ -1811,21 +2095,22 @@ def openweather_aqi_details(lat: float, lon: float):
         if best:
             dominant = best[0]
 
-    return {
-        "aqi_0_500": aqi_0_500,
-        "label": aqi_label_500(aqi_0_500),
-        "health_tip": aqi_health_tip(aqi_0_500),
-        "components": comp,
-        "dominant": dominant,
-    }
+    return AqiDetails(
+        aqi_0_500=aqi_0_500,
+        label=aqi_label_500(aqi_0_500),
+        health_tip=aqi_health_tip(aqi_0_500),
+        components=comp,
+        dominant=dominant,
+    )
 
 
+@cached(ttl=30)
 def tomtom_traffic(lat: float, lon: float):
     url = "https://api.tomtom.com/traffic/services/4/flowSegmentData/absolute/10/json"
     params = {"point": f"{lat},{lon}", "key": TOMTOM_API_KEY}
-    r = requests.get(url, params=params, timeout=20)
+    r = TOMTOM_SESS.get(url, params=params, timeout=20)
     r.raise_for_status()
-    js = r.json()
+    js = orjson.loads(r.content)
     flow = js.get("flowSegmentData", {}) or {}
 
     cur = flow.get("currentSpeed")
@@ -1847,12 +2132,12 @@ def tomtom_traffic(lat: float, lon: float):
         else:
             label = "Heavy"
 
-    return {
-        "currentSpeed_kmh": cur,
-        "freeFlowSpeed_kmh": free,
-        "congestion_ratio": round(ratio, 2) if ratio is not None else None,
-        "congestion_label": label,
-    }
+    return Traffic(
+        currentSpeed_kmh=cur,
+        freeFlowSpeed_kmh=free,
+        congestion_ratio=round(ratio, 2) if ratio is not None else None,
+        congestion_label=label,
+    )
 
 
 # ---------------------------
@@ -1879,14 +2164,20 @@ def tomtom_route(o_lat, o_lon, d_lat, d_lon, mode: str):
     elif mode == "avoid_highways":
         params["avoid"] = "motorways"
 
-    r = requests.get(url, params=params, timeout=30)
+    r = TOMTOM_SESS.get(url, params=params, timeout=30)
     r.raise_for_status()
-    js = r.json()
+    js = orjson.loads(r.content)
 
     route0 = js["routes"][0]
     summary = route0.get("summary", {}) or {}
     points = route0["legs"][0]["points"]
-    coords = [[p["latitude"], p["longitude"]] for p in points]
+    # Encoded polyline is ~6x smaller than the raw [[lat,lon],...] JSON
+    # for long routes; the frontend decodes it with Leaflet's
+    # Polyline.encoded plugin. polyline.encode needs a real sequence
+    # (it subscripts and zips the input twice), so build a list.
+    coords_enc = polyline.encode(
+        [(p["latitude"], p["longitude"]) for p in points], precision=5
+    )
 
     distance_km = (summary.get("lengthInMeters", 0) or 0) / 1000.0
     time_min = (summary.get("travelTimeInSeconds", 0) or 0) / 60.0
@@ -1905,7 +2196,7 @@ def tomtom_route(o_lat, o_lon, d_lat, d_lon, mode: str):
         "distance_km": round(distance_km, 2),
         "travel_time_min": round(time_min, 1),
         "traffic_delay_min": round(delay_min, 1),
-        "coords": coords,
+        "coords_enc": coords_enc,
         "instructions": instr,
     }
 
@@ -1915,892 +2206,26 @@ def tomtom_route(o_lat, o_lon, d_lat, d_lon, mode: str):
 # ---------------------------
 @app.route("/")
 def index():
-    traffic_tile = TOMTOM_TRAFFIC_TILE_URL.replace("{key}", TOMTOM_API_KEY)
-
-    html = r"""
-<!doctype html>
-<html lang="en">
-<head>
-  <meta charset="utf-8"/>
-  <meta name="viewport" content="width=device-width, initial-scale=1"/>
-  <title>Geo Dashboard (India)</title>
-
-  <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
-  <link rel="stylesheet" href="https://unpkg.com/leaflet@1.9.4/dist/leaflet.css"/>
-  <script src="https://unpkg.com/leaflet@1.9.4/dist/leaflet.js"></script>
-
-  <style>
-    :root{
-      --bg0:#050814; --bg1:#09111f;
-      --card: rgba(255,255,255,.07);
-      --card2: rgba(0,0,0,.30);
-      --stroke: rgba(255,255,255,.13);
-      --text: rgba(255,255,255,.93);
-      --muted: rgba(255,255,255,.68);
-      --accent1:#7c3aed; --accent2:#06b6d4;
-      --radius:22px;
-    }
-    *{box-sizing:border-box}
-    body{
-      margin:0; color:var(--text);
-      font-family: ui-sans-serif, system-ui, Segoe UI, Arial;
-      background:
-        radial-gradient(1100px 700px at 20% -20%, rgba(124,58,237,.55), transparent 60%),
-        radial-gradient(900px 600px at 95% 5%, rgba(6,182,212,.45), transparent 60%),
-        linear-gradient(180deg, var(--bg0), var(--bg1));
-      min-height:100vh; overflow-x:hidden;
-    }
-    .bgGlow{
-      position:fixed; inset:-40px; pointer-events:none;
-      background:
-        radial-gradient(600px 300px at 20% 30%, rgba(124,58,237,.14), transparent 60%),
-        radial-gradient(700px 400px at 80% 20%, rgba(6,182,212,.12), transparent 60%),
-        radial-gradient(500px 320px at 70% 80%, rgba(124,58,237,.10), transparent 60%);
-      filter: blur(2px);
-      animation: floatGlow 12s ease-in-out infinite alternate;
-      opacity:.9;
-    }
-    @keyframes floatGlow{ from{transform:translate3d(0,0,0)} to{transform:translate3d(-18px,10px,0)} }
+    # Tiles go through our proxy route so the TomTom key never reaches
+    # the browser and a fronting cache can share tiles across users.
+    resp = Response(render_template("index.html", TRAFFIC_TILE_URL="/tiles/{z}/{x}/{y}.png"))
+    resp.headers["Cache-Control"] = "public, max-age=3600"
+    return resp
 
-    .topbar{
-      position:sticky; top:0; z-index:50;
-      backdrop-filter: blur(14px);
-      background: rgba(0,0,0,.35);
-      border-bottom: 1px solid var(--stroke);
-    }
-    .topbar-inner{
-      width: min(95vw, 1700px);
-      margin: 0 auto;
-      padding: 16px 22px;
-      display:flex; align-items:center; gap:14px;
-    }
-    .brand .title{font-weight:950;font-size:20px}
-    .brand .sub{font-size:12px;color:var(--muted);margin-top:3px}
-    .pill{
-      margin-left:auto;
-      padding:10px 14px;
-      border-radius:999px;
-      border:1px solid var(--stroke);
-      background: rgba(255,255,255,.07);
-      color: var(--muted);
-      font-size: 12px;
-      white-space:nowrap;
-      animation: pillPop .35s ease;
-    }
-    @keyframes pillPop{ from{transform:scale(.98);opacity:.6} to{transform:scale(1);opacity:1} }
-
-    .wrap{
-      width: min(95vw, 1700px);
-      margin: 0 auto;
-      padding: 18px 22px 26px;
-      display:grid;
-      grid-template-columns: 1.35fr 0.65fr;
-      gap: 16px;
-    }
-    .panel{
-      border:1px solid var(--stroke);
-      background: var(--card);
-      border-radius: var(--radius);
-      box-shadow: 0 22px 55px rgba(0,0,0,.38);
-      overflow:hidden;
-      animation: enter .55s ease both;
-    }
-    @keyframes enter{ from{opacity:0; transform:translateY(10px)} to{opacity:1; transform:translateY(0)} }
-    .panel-pad{ padding: 16px; }
-
-    .searchRow{ display:flex; gap:12px; align-items:center; position:relative; }
-    .input{
-      flex:1;
-      background: rgba(255,255,255,.07);
-      border: 1px solid var(--stroke);
-      color: var(--text);
-      border-radius: 16px;
-      padding: 14px 16px;
-      outline:none;
-      font-size: 14px;
-    }
-    .btn{
-      border:none; cursor:pointer; color:white;
-      font-weight: 950;
-      border-radius: 16px;
-      padding: 14px 16px;
-      background: linear-gradient(90deg, var(--accent1), var(--accent2));
-      box-shadow: 0 16px 35px rgba(0,0,0,.28);
-      transition: transform .15s ease, filter .2s ease;
-      white-space: nowrap;
-    }
-    .btn:hover{ transform: translateY(-1px); filter: brightness(1.05) }
-    .btn-ghost{
-      background: rgba(255,255,255,.07);
-      border: 1px solid var(--stroke);
-      color: var(--text);
-      box-shadow:none;
-      font-weight: 900;
-    }
 
-    .suggestBox{
-      position:absolute;
-      left:0; right:140px; top:54px;
-      background: rgba(0,0,0,.65);
-      border: 1px solid rgba(255,255,255,.14);
-      border-radius: 16px;
-      backdrop-filter: blur(12px);
-      overflow:hidden;
-      display:none;
-      z-index:70;
-    }
-    .sugItem{
-      padding: 10px 12px;
-      border-bottom: 1px solid rgba(255,255,255,.08);
-      cursor:pointer;
-      color: rgba(255,255,255,.92);
-      font-size: 13px;
-    }
-    .sugItem:hover{ background: rgba(255,255,255,.06); }
-    .sugSmall{ display:block; color: rgba(255,255,255,.62); font-size: 11px; margin-top:2px;}
-
-    .toolbar{
-      display:flex; gap:10px; align-items:center;
-      margin-top: 12px;
-      color: var(--muted);
-      font-size: 12px;
-      flex-wrap: wrap;
-    }
-    .select{
-      background: rgba(255,255,255,.07);
-      border: 1px solid var(--stroke);
-      color: var(--text);
-      border-radius: 14px;
-      padding: 10px 12px;
-      outline:none;
-      font-weight: 900;
-    }
-
-    .kpis{
-      display:grid;
-      grid-template-columns: repeat(3, 1fr);
-      gap: 14px;
-      margin-top: 14px;
-    }
-    .card{
-      position:relative;
-      background: var(--card2);
-      border:1px solid var(--stroke);
-      border-radius: 18px;
-      padding: 14px 14px;
-      display:flex; gap: 12px; align-items:flex-start;
-      overflow:hidden;
-    }
-    .icon{
-      width:44px;height:44px;border-radius: 14px;
-      display:flex;align-items:center;justify-content:center;
-      background: linear-gradient(135deg, rgba(124,58,237,.62), rgba(6,182,212,.40));
-      border:1px solid rgba(255,255,255,.15);
-      flex:0 0 auto;
-      font-size: 20px;
-    }
-    .label{ color: var(--muted); font-size: 12px; font-weight: 900; }
-    .value{ font-size: 30px; font-weight: 980; margin-top: 4px; }
-    .meta{ color: var(--muted); font-size: 12px; margin-top: 4px; }
-
-    .tempFire::before{
-      content:""; position:absolute; inset:-60px; pointer-events:none;
-      background:
-        radial-gradient(220px 140px at 25% 70%, rgba(255,153,0,.28), transparent 60%),
-        radial-gradient(220px 160px at 55% 75%, rgba(255,60,0,.22), transparent 60%),
-        radial-gradient(240px 170px at 80% 70%, rgba(255,200,0,.16), transparent 60%);
-      opacity:.85; animation: fireFlicker 1.2s ease-in-out infinite;
-    }
-    .tempFire::after{
-      content:""; position:absolute; inset:0; pointer-events:none;
-      background:
-        radial-gradient(6px 6px at 15% 85%, rgba(255,220,150,.85), transparent 60%),
-        radial-gradient(5px 5px at 35% 90%, rgba(255,200,120,.75), transparent 60%),
-        radial-gradient(4px 4px at 60% 92%, rgba(255,230,160,.70), transparent 60%),
-        radial-gradient(5px 5px at 80% 88%, rgba(255,210,140,.65), transparent 60%);
-      opacity:.7; animation: embersUp 2.4s linear infinite;
-    }
-    @keyframes fireFlicker{
-      0%{ transform: translate3d(0,0,0) scale(1) }
-      50%{ transform: translate3d(-10px,6px,0) scale(1.02) }
-      100%{ transform: translate3d(0,0,0) scale(1) }
-    }
-    @keyframes embersUp{ from{ transform: translateY(0); opacity:.65 } to{ transform: translateY(-26px); opacity:.15 } }
-
-    .aqiWind svg{
-      position:absolute; right:-12px; top:-6px;
-      opacity:.40;
-      width:150px; height:90px;
-      transform: rotate(-8deg);
-      pointer-events:none;
-    }
-    .aqiWind path{
-      stroke: rgba(6,182,212,.85);
-      stroke-width: 2;
-      fill: none;
-      stroke-linecap: round;
-      stroke-dasharray: 12 10;
-      animation: windMove 2.2s linear infinite;
-    }
-    .aqiWind path:nth-child(2){ opacity:.55; animation-duration: 2.8s }
-    .aqiWind path:nth-child(3){ opacity:.35; animation-duration: 3.3s }
-    @keyframes windMove{
-      from { stroke-dashoffset: 0; transform: translateX(0) }
-      to   { stroke-dashoffset: -60; transform: translateX(-18px) }
-    }
-
-    .carLane{
-      position:absolute; left:0; right:0; bottom:8px; height:18px;
-      opacity:.18;
-      background: linear-gradient(90deg, transparent, rgba(255,255,255,.25), transparent);
-    }
-    .car{
-      position:absolute; bottom:6px; left:-30px;
-      font-size: 16px;
-      animation: carDrive 2.6s linear infinite;
-      opacity:.65;
-    }
-    @keyframes carDrive{ from{transform:translateX(0)} to{transform:translateX(360px)} }
-
-    .meter{
-      margin-top:10px; position:relative;
-      height: 14px; border-radius: 999px; overflow:hidden;
-      border: 1px solid rgba(255,255,255,.14);
-      background: rgba(255,255,255,.08);
-    }
-    .meter .seg{ height:100%; float:left; }
-    .s1{ width:20%; background:#22c55e; }
-    .s2{ width:20%; background:#eab308; }
-    .s3{ width:20%; background:#f97316; }
-    .s4{ width:20%; background:#ef4444; }
-    .s5{ width:20%; background:#7f1d1d; }
-    .needle{
-      position:absolute; top:-6px;
-      width: 2px; height: 26px;
-      background: rgba(255,255,255,.95);
-      transform: translateX(-1px);
-    }
-    .needleDot{
-      position:absolute; top:-9px;
-      width: 10px; height: 10px;
-      border-radius: 999px;
-      background: rgba(255,255,255,.95);
-      transform: translateX(-5px);
-    }
-    .meterTicks{
-      display:flex; justify-content:space-between;
-      font-size:10px; color: rgba(255,255,255,.55);
-      margin-top:6px; font-weight:800;
-    }
-
-    .grid2{ display:grid; grid-template-columns: 1fr 1fr; gap: 14px; margin-top: 14px; }
-    .chartBox{ padding: 14px; height: 320px; }
-    canvas{ height: 260px !important; }
-
-    #mapWrap{ position:relative; }
-    #map{ height: 360px; border-radius: 18px; border:1px solid var(--stroke); overflow:hidden; }
-    .mapCtl{
-      position:absolute; right:12px; top:12px; z-index: 600;
-      display:flex; align-items:center; gap:8px;
-      padding:10px 10px;
-      border-radius: 14px;
-      background: rgba(0,0,0,.45);
-      backdrop-filter: blur(10px);
-      border: 1px solid rgba(255,255,255,.14);
-      color: rgba(255,255,255,.9);
-      font-size: 12px;
-      box-shadow: 0 10px 30px rgba(0,0,0,.35);
-    }
-    .mapCtl select, .mapCtl button{
-      background: rgba(255,255,255,.10);
-      border: 1px solid rgba(255,255,255,.16);
-      color: rgba(255,255,255,.92);
-      border-radius: 12px;
-      padding: 8px 10px;
-      outline: none;
-      font-weight: 900;
-      cursor:pointer;
-    }
-    .mapCtl option{ color:#111; }
-
-    .modePills{ display:flex; gap:8px; flex-wrap:wrap; margin-top:10px; }
-    .pillBtn{
-      padding:8px 10px; border-radius:999px;
-      border:1px solid rgba(255,255,255,.14);
-      background: rgba(255,255,255,.07);
-      color: rgba(255,255,255,.88);
-      font-weight:900; font-size:12px;
-      cursor:pointer;
-    }
-    .pillBtn.active{
-      background: linear-gradient(90deg, rgba(124,58,237,.65), rgba(6,182,212,.45));
-      border-color: rgba(255,255,255,.18);
-    }
-
-    .rightHead{
-      display:flex; align-items:center; justify-content:space-between;
-      padding: 14px 16px;
-      border-bottom: 1px solid var(--stroke);
-      background: rgba(0,0,0,.18);
-    }
-    .feed{ max-height: 780px; overflow:auto; }
-    .item{ padding: 14px 16px; border-bottom: 1px solid rgba(255,255,255,.08); }
-    .item:hover{ background: rgba(255,255,255,.03); cursor:pointer; }
-    .rowMini{ display:flex; gap:10px; flex-wrap:wrap; color: var(--muted); font-size: 12px; margin-top: 8px; }
-    .tag{
-      padding: 6px 10px;
-      border-radius: 999px;
-      border:1px solid rgba(255,255,255,.10);
-      background: rgba(255,255,255,.05);
-      font-weight: 800;
-    }
-
-    @media (max-width: 1200px){
-      .wrap{ grid-template-columns: 1fr; }
-      .kpis{ grid-template-columns: 1fr; }
-      .grid2{ grid-template-columns: 1fr; }
-      #map{ height: 320px; }
-      .feed{ max-height: 420px; }
-      .suggestBox{ right:0; }
-    }
-  </style>
-</head>
-<body>
-  <div class="bgGlow"></div>
-
-  <div class="topbar">
-    <div class="topbar-inner">
-      <div class="brand">
-        <div class="title">Geo Dashboard (India)</div>
-        <div class="sub">Weather + AQI + Traffic + Routing + DB history</div>
-      </div>
-      <div class="pill" id="placePill">No location selected</div>
-    </div>
-  </div>
-
-  <div class="wrap">
-    <div class="panel panel-pad">
-
-      <div class="searchRow">
-        <input class="input" id="q" placeholder="Search place (e.g., Bengaluru)" autocomplete="off"/>
-        <button class="btn" onclick="doSearch()">Search</button>
-        <button class="btn btn-ghost" onclick="recenter()">Recenter</button>
-        <div class="suggestBox" id="sugs"></div>
-      </div>
-
-      <div class="toolbar" style="margin-top:10px;">
-        <button class="btn btn-ghost" onclick="useMyLocation()">📍 Use my location</button>
-        <button class="btn btn-ghost" onclick="addFav()">⭐ Add favourite</button>
-        <select class="select" id="favSel" onchange="goFav()">
-          <option value="">Favourites</option>
-        </select>
-        <span style="margin-left:auto;font-weight:900" id="status">Ready</span>
-      </div>
-
-      <div class="toolbar" style="margin-top:10px;">
-        <input class="input" id="origin" placeholder="Origin (e.g., Bengaluru)" style="max-width:420px"/>
-        <input class="input" id="destination" placeholder="Destination (e.g., Mysuru)" style="max-width:420px"/>
-        <button class="btn" onclick="getRoute()">Best Route</button>
-        <button class="btn btn-ghost" onclick="stopRouteAnim()">Clear</button>
-        <span style="margin-left:auto; font-weight:900" id="routeInfo">—</span>
-      </div>
-
-      <div class="modePills">
-        <button class="pillBtn active" id="m_fastest" onclick="setMode('fastest')">Fastest</button>
-        <button class="pillBtn" id="m_shortest" onclick="setMode('shortest')">Shortest</button>
-        <button class="pillBtn" id="m_avoid_tolls" onclick="setMode('avoid_tolls')">Avoid tolls</button>
-        <button class="pillBtn" id="m_avoid_highways" onclick="setMode('avoid_highways')">Avoid highways</button>
-      </div>
-
-      <div class="toolbar" style="margin-top:10px;">
-        <span class="tag" id="st_n">Today: —</span>
-        <span class="tag" id="st_aqi">Avg AQI: —</span>
-        <span class="tag" id="st_max">Max AQI: —</span>
-        <span class="tag" id="st_spd">Avg speed: —</span>
-        <span class="tag" id="st_tmp">Avg temp: —</span>
-        <button class="btn btn-ghost" style="margin-left:auto" onclick="exportCSV()">⬇ Export CSV</button>
-      </div>
-
-      <div class="kpis">
-        <div class="card tempFire">
-          <div class="icon">🌡️</div>
-          <div style="width:100%">
-            <div class="label">Temperature</div>
-            <div class="value" id="kTemp">—</div>
-            <div class="meta" id="kHum">Humidity: —</div>
-            <div class="meta" id="kWx">—</div>
-          </div>
-        </div>
-
-        <div class="card aqiWind">
-          <div class="icon">🫁</div>
-          <div style="width:100%">
-            <div class="label">AQI (0–500)</div>
-            <div class="value" id="kAqi">—</div>
-            <div class="meta" id="kAqiLbl">—</div>
-
-            <div class="meter">
-              <div class="seg s1"></div><div class="seg s2"></div><div class="seg s3"></div><div class="seg s4"></div><div class="seg s5"></div>
-              <div class="needle" id="aqiNeedle" style="left:0%"></div>
-              <div class="needleDot" id="aqiNeedleDot" style="left:0%"></div>
-            </div>
-            <div class="meterTicks">
-              <span>0</span><span>100</span><span>200</span><span>300</span><span>400</span><span>500</span>
-            </div>
-
-            <div class="meta" id="kPoll">Pollutants: —</div>
-            <div class="meta" id="kTip">Tip: —</div>
-          </div>
-
-          <svg viewBox="0 0 200 100" aria-hidden="true">
-            <path d="M10 35 C40 20, 70 20, 100 35 S160 50, 190 35" />
-            <path d="M20 55 C55 40, 85 40, 120 55 S170 70, 195 55" />
-            <path d="M5 75 C45 62, 80 62, 115 75 S165 88, 198 75" />
-          </svg>
-        </div>
-
-        <div class="card">
-          <div class="icon">🚗</div>
-          <div style="width:100%">
-            <div class="label">Traffic</div>
-            <div class="value" id="kTrf">—</div>
-            <div class="meta" id="kTrf2">—</div>
-            <div class="meta" id="kWind">Wind: —</div>
-          </div>
-          <div class="carLane"></div>
-          <div class="car">🚘</div>
-        </div>
-      </div>
-
-      <div class="grid2">
-        <div class="panel chartBox">
-          <div class="label" style="margin-bottom:8px">AQI trend (latest 20)</div>
-          <canvas id="cAqi"></canvas>
-        </div>
-        <div class="panel chartBox">
-          <div class="label" style="margin-bottom:8px">Traffic speed trend (latest 20)</div>
-          <canvas id="cTrf"></canvas>
-        </div>
-      </div>
-
-      <div style="margin-top:14px" class="panel panel-pad">
-        <div class="label" style="margin-bottom:10px">Map</div>
-        <div id="mapWrap">
-          <div class="mapCtl">
-            <select id="bm" onchange="switchBasemap()">
-              <option value="osm" selected>OpenStreetMap</option>
-              <option value="dark">Carto Dark</option>
-              <option value="sat">Esri Satellite</option>
-            </select>
-            <button onclick="toggleTraffic()">Traffic</button>
-          </div>
-          <div id="map"></div>
-        </div>
-
-        <div class="toolbar" id="turns" style="margin-top:10px; display:none;"></div>
-      </div>
-    </div>
-
-    <div class="panel">
-      <div class="rightHead">
-        <div>
-          <div style="font-weight:980; font-size:14px">Recent searches</div>
-          <div style="font-size:12px;color:rgba(255,255,255,.65);margin-top:2px">Last 5 only</div>
-        </div>
-        <button class="btn btn-ghost" onclick="loadRecent()">Refresh</button>
-      </div>
-      <div class="feed" id="list"></div>
-    </div>
-  </div>
-
-<script>
-  const TRAFFIC_TILE_URL = "{{TRAFFIC_TILE_URL}}";
-
-  function clamp(n,a,b){ return Math.max(a, Math.min(b, n)); }
-  function setStatus(msg){ document.getElementById("status").innerText = msg; }
-
-  function fmtTimeLocal(iso){
-    try{
-      const d = new Date(iso);
-      return d.toLocaleTimeString([], { hour:"2-digit", minute:"2-digit" });
-    }catch(e){ return "—"; }
-  }
-  function fmtDateTimeLocal(iso){
-    try{
-      const d = new Date(iso);
-      return d.toLocaleString([], {
-        year:"numeric", month:"2-digit", day:"2-digit",
-        hour:"2-digit", minute:"2-digit"
-      });
-    }catch(e){ return iso || "—"; }
-  }
-
-  function setAqiNeedle(aqi){
-    const v = (aqi==null) ? 0 : clamp(Number(aqi), 0, 500);
-    const pct = (v / 500) * 100;
-    document.getElementById("aqiNeedle").style.left = pct + "%";
-    document.getElementById("aqiNeedleDot").style.left = pct + "%";
-  }
-
-  let lastLatLng = null;
-  let routeMode = "fastest";
-
-  function setMode(m){
-    routeMode = m;
-    ["fastest","shortest","avoid_tolls","avoid_highways"].forEach(x=>{
-      document.getElementById("m_"+x).classList.toggle("active", x===m);
-    });
-  }
-
-  const map = L.map('map', { zoomControl: true }).setView([20.5937, 78.9629], 5);
-  const bmOSM = L.tileLayer('https://tile.openstreetmap.org/{z}/{x}/{y}.png', { maxZoom: 19 });
-  const bmDark = L.tileLayer('https://{s}.basemaps.cartocdn.com/dark_all/{z}/{x}/{y}{r}.png', { maxZoom: 20, subdomains: 'abcd' });
-  const bmSat = L.tileLayer('https://server.arcgisonline.com/ArcGIS/rest/services/World_Imagery/MapServer/tile/{z}/{y}/{x}', { maxZoom: 19 });
-  let currentBasemap = bmOSM; currentBasemap.addTo(map);
-
-  function switchBasemap(){
-    const v = document.getElementById("bm").value;
-    if(currentBasemap) map.removeLayer(currentBasemap);
-    currentBasemap = (v==="dark") ? bmDark : (v==="sat" ? bmSat : bmOSM);
-    currentBasemap.addTo(map);
-    if(trafficLayerOn && trafficLayer) trafficLayer.bringToFront();
-  }
-
-  let trafficLayerOn = false;
-  let trafficLayer = null;
-  function toggleTraffic(){
-    if(!TRAFFIC_TILE_URL){ alert("Traffic tiles not configured."); return; }
-    trafficLayerOn = !trafficLayerOn;
-    if(trafficLayerOn){
-      if(!trafficLayer){
-        trafficLayer = L.tileLayer(TRAFFIC_TILE_URL, { opacity: 0.75, maxZoom: 19 });
-        trafficLayer.on('tileerror', ()=>{ setStatus("Traffic tiles not allowed for this key/plan"); });
-      }
-      trafficLayer.addTo(map);
-      setStatus("Traffic overlay ON");
-    }else{
-      if(trafficLayer) map.removeLayer(trafficLayer);
-      setStatus("Traffic overlay OFF");
-    }
-  }
-  L.control.scale({ imperial:false }).addTo(map);
-
-  let marker = null;
-  function setMarker(lat, lon, place){
-    lastLatLng = [lat, lon];
-    if(marker) marker.remove();
-    marker = L.marker([lat, lon]).addTo(map).bindPopup(place).openPopup();
-  }
-  function recenter(){
-    if(!lastLatLng) return;
-    map.setView(lastLatLng, 12, { animate: true });
-  }
-
-  function makeGradient(ctx){
-    const g = ctx.createLinearGradient(0, 0, 0, 260);
-    g.addColorStop(0, "rgba(6,182,212,.35)");
-    g.addColorStop(1, "rgba(6,182,212,0)");
-    return g;
-  }
-  const ctxA = document.getElementById("cAqi").getContext("2d");
-  const ctxT = document.getElementById("cTrf").getContext("2d");
-
-  const chartAqi = new Chart(ctxA, {
-    type:"line",
-    data:{ labels:[], datasets:[{ data:[], tension:.35, borderWidth:2.5, pointRadius:3.5, fill:true, backgroundColor: makeGradient(ctxA) }]},
-    options:{ responsive:true, maintainAspectRatio:false, plugins:{ legend:{ display:false } }, animation:{ duration:900 } }
-  });
-  const chartTrf = new Chart(ctxT, {
-    type:"line",
-    data:{ labels:[], datasets:[{ data:[], tension:.35, borderWidth:2.5, pointRadius:3.5, fill:true, backgroundColor: makeGradient(ctxT) }]},
-    options:{ responsive:true, maintainAspectRatio:false, plugins:{ legend:{ display:false } }, animation:{ duration:900 } }
-  });
-
-  let sugTimer = null;
-  const sugBox = document.getElementById("sugs");
-  const qEl = document.getElementById("q");
-
-  qEl.addEventListener("input", ()=>{
-    const q = qEl.value.trim();
-    if(sugTimer) clearTimeout(sugTimer);
-    if(q.length < 3){ sugBox.style.display="none"; return; }
-    sugTimer = setTimeout(()=>loadSuggest(q), 180);
-  });
-  qEl.addEventListener("blur", ()=> setTimeout(()=>{ sugBox.style.display="none"; }, 150));
-
-  async function loadSuggest(q){
-    try{
-      const r = await fetch("/api/suggest?q="+encodeURIComponent(q));
-      const js = await r.json();
-      if(js.error){ return; }
-      if(!js.items || js.items.length===0){ sugBox.style.display="none"; return; }
-      sugBox.innerHTML = "";
-      js.items.forEach(it=>{
-        const d = document.createElement("div");
-        d.className = "sugItem";
-        d.innerHTML = `${it.label}<span class="sugSmall">${Number(it.lat).toFixed(5)}, ${Number(it.lon).toFixed(5)}</span>`;
-        d.onclick = ()=>{
-          qEl.value = it.label;
-          sugBox.style.display="none";
-          doSearch();
-        };
-        sugBox.appendChild(d);
-      });
-      sugBox.style.display = "block";
-    }catch(e){}
-  }
-
-  function loadFavs(){
-    const raw = localStorage.getItem("geo_favs") || "[]";
-    let favs = [];
-    try{ favs = JSON.parse(raw) }catch(e){ favs=[] }
-    const sel = document.getElementById("favSel");
-    sel.innerHTML = `<option value="">Favourites</option>`;
-    favs.forEach((f, i)=>{
-      const opt = document.createElement("option");
-      opt.value = String(i);
-      opt.innerText = f.name;
-      sel.appendChild(opt);
-    });
-  }
-  function addFav(){
-    const q = (document.getElementById("q").value || "").trim();
-    if(!q){ alert("Search a place first"); return; }
-    const raw = localStorage.getItem("geo_favs") || "[]";
-    let favs = [];
-    try{ favs = JSON.parse(raw) }catch(e){ favs=[] }
-    if(favs.find(x=>x.name===q)){ alert("Already in favourites"); return; }
-    favs.push({name:q});
-    localStorage.setItem("geo_favs", JSON.stringify(favs));
-    loadFavs();
-    setStatus("Added favourite ✓");
-  }
-  function goFav(){
-    const idx = document.getElementById("favSel").value;
-    if(idx===""){ return; }
-    const raw = localStorage.getItem("geo_favs") || "[]";
-    let favs = [];
-    try{ favs = JSON.parse(raw) }catch(e){ favs=[] }
-    const f = favs[Number(idx)];
-    if(!f) return;
-    document.getElementById("q").value = f.name;
-    doSearch();
-  }
-
-  async function useMyLocation(){
-    if(!navigator.geolocation){ alert("Geolocation not supported"); return; }
-    setStatus("Getting location…");
-    navigator.geolocation.getCurrentPosition(async (pos)=>{
-      const lat = pos.coords.latitude;
-      const lon = pos.coords.longitude;
-      try{
-        const r = await fetch("/api/reverse?lat="+lat+"&lon="+lon);
-        const js = await r.json();
-        const name = js.place || "My location";
-        document.getElementById("q").value = name;
-        await doSearch();
-      }catch(e){
-        setStatus("Location error");
-      }
-    }, ()=>{ setStatus("Location permission denied"); }, { enableHighAccuracy:true, timeout:8000 });
-  }
-
-  async function loadStats(){
-    const r = await fetch("/api/stats");
-    const js = await r.json();
-    document.getElementById("st_n").innerText = "Today: " + (js.n ?? "—");
-    document.getElementById("st_aqi").innerText = "Avg AQI: " + (js.avg_aqi!=null ? js.avg_aqi.toFixed(0) : "—");
-    document.getElementById("st_max").innerText = "Max AQI: " + (js.max_aqi ?? "—");
-    document.getElementById("st_spd").innerText = "Avg speed: " + (js.avg_speed!=null ? js.avg_speed.toFixed(0)+" km/h" : "—");
-    document.getElementById("st_tmp").innerText = "Avg temp: " + (js.avg_temp!=null ? js.avg_temp.toFixed(1)+" °C" : "—");
-  }
-  function exportCSV(){ window.open("/api/export?limit=200", "_blank"); }
-
-  async function loadRecent(){
-    const r = await fetch("/api/recent?limit=20");
-    const js = await r.json();
-
-    const el = document.getElementById("list");
-    el.innerHTML = "";
-
-    const rows = js.rows || [];
-
-    rows.slice(0,5).forEach(row=>{
-      const d = document.createElement("div");
-      d.className="item";
-      const place = row.place_name || row.query_text;
-
-      d.innerHTML = `
-        <div style="font-weight:950">${place}</div>
-        <div class="rowMini">
-          <span class="tag">${fmtDateTimeLocal(row.created_at)}</span>
-          <span class="tag">Temp: ${row.temperature_c ?? "—"} °C</span>
-          <span class="tag">AQI: ${row.aqi ?? "—"} / 500</span>
-          <span class="tag">Speed: ${row.traffic_speed_kmh ?? "—"} km/h</span>
-        </div>
-      `;
-
-      d.onclick = ()=>{
-        document.getElementById("q").value = row.query_text || place;
-        if(row.lat && row.lon){
-          setMarker(row.lat, row.lon, place);
-          document.getElementById("placePill").innerText =
-            `${place} (${Number(row.lat).toFixed(5)}, ${Number(row.lon).toFixed(5)})`;
-          recenter();
-        }
-      };
-      el.appendChild(d);
-    });
-
-    const last20 = rows.slice(0,20).reverse();
-    chartAqi.data.labels = last20.map(x=>fmtTimeLocal(x.created_at));
-    chartAqi.data.datasets[0].data = last20.map(x=>x.aqi);
-    chartAqi.update();
-
-    chartTrf.data.labels = last20.map(x=>fmtTimeLocal(x.created_at));
-    chartTrf.data.datasets[0].data = last20.map(x=>x.traffic_speed_kmh);
-    chartTrf.update();
-  }
-
-  async function doSearch(){
-    const q = document.getElementById("q").value.trim();
-    if(!q) return;
-
-    setStatus("Fetching…");
-    const r = await fetch("/api/search?query=" + encodeURIComponent(q));
-    const js = await r.json();
-    if(js.error){
-      alert(js.error);
-      setStatus("Error");
-      return;
-    }
-
-    document.getElementById("placePill").innerText =
-      `${js.place} (${js.lat.toFixed(5)}, ${js.lon.toFixed(5)})`;
-
-    document.getElementById("kTemp").innerText = (js.temperature_c ?? "—") + (js.temperature_c!=null ? " °C" : "");
-    document.getElementById("kHum").innerText = "Humidity: " + (js.humidity_pct ?? "—") + (js.humidity_pct!=null ? " %" : "");
-    document.getElementById("kWind").innerText = "Wind: " + (js.wind_speed_ms ?? "—") + (js.wind_speed_ms!=null ? " m/s" : "");
-
-    const wxBits = [];
-    if(js.feels_like_c!=null) wxBits.push("Feels like " + js.feels_like_c + " °C");
-    if(js.clouds_pct!=null) wxBits.push("Clouds " + js.clouds_pct + "%");
-    if(js.rain_1h_mm!=null) wxBits.push("Rain(1h) " + js.rain_1h_mm + " mm");
-    if(js.weather_desc) wxBits.push(js.weather_desc);
-    document.getElementById("kWx").innerText = wxBits.length ? wxBits.join(" • ") : "—";
-
-    const aqiVal = js.aqi?.aqi_0_500;
-    document.getElementById("kAqi").innerText = (aqiVal ?? "—");
-    document.getElementById("kAqiLbl").innerText = js.aqi?.label ?? "—";
-    setAqiNeedle(aqiVal);
-
-    const comp = js.aqi?.components || {};
-    const dom = js.aqi?.dominant;
-    const fmt = (k)=> (comp[k]!=null ? `${k.toUpperCase()}:${comp[k]}` : null);
-    const pieces = ["pm2_5","pm10","no2","so2","o3","co"].map(fmt).filter(Boolean);
-    document.getElementById("kPoll").innerText =
-      (pieces.length ? ("Pollutants: " + pieces.join(" • ")) : "Pollutants: —") +
-      (dom ? (" • Dominant: " + dom.toUpperCase()) : "");
-    document.getElementById("kTip").innerText = "Tip: " + (js.aqi?.health_tip ?? "—");
-
-    const sp = js.traffic?.currentSpeed_kmh;
-    const ff = js.traffic?.freeFlowSpeed_kmh;
-    const lbl = js.traffic?.congestion_label;
-    document.getElementById("kTrf").innerText = (sp ?? "—") + (sp!=null ? " km/h" : "");
-    document.getElementById("kTrf2").innerText =
-      (lbl ? (lbl + " • ") : "") + "Free flow: " + (ff ?? "—") + (ff!=null ? " km/h" : "");
-
-    setMarker(js.lat, js.lon, js.place);
-    map.setView([js.lat, js.lon], 12, { animate:true });
-
-    await loadRecent();
-    await loadStats();
-    setStatus("Updated ✓");
-  }
-
-  let routeLine = null;
-  let carMarker = null;
-  let carTimer = null;
-
-  function stopRouteAnim(){
-    if(carTimer){ clearInterval(carTimer); carTimer = null; }
-    if(carMarker){ map.removeLayer(carMarker); carMarker = null; }
-    if(routeLine){ map.removeLayer(routeLine); routeLine = null; }
-    document.getElementById("turns").style.display = "none";
-    document.getElementById("turns").innerHTML = "";
-    document.getElementById("routeInfo").innerText = "—";
-  }
-
-  function fmtTime(mins){
-    if(mins==null) return "—";
-    const m = Math.max(0, Number(mins));
-    if(m < 60) return `${m.toFixed(0)} min`;
-    const h = Math.floor(m/60);
-    const r = Math.round(m - h*60);
-    return `${h} hr ${r} min`;
-  }
-
-  async function getRoute(){
-    const o = document.getElementById("origin").value.trim();
-    const d = document.getElementById("destination").value.trim();
-    if(!o || !d){ alert("Enter origin and destination"); return; }
-
-    document.getElementById("routeInfo").innerText = "Fetching route…";
-    const r = await fetch("/api/route?origin=" + encodeURIComponent(o) + "&destination=" + encodeURIComponent(d) + "&mode=" + encodeURIComponent(routeMode));
-    const js = await r.json();
-    if(js.error){
-      alert(js.error);
-      document.getElementById("routeInfo").innerText = "—";
-      return;
-    }
-
-    stopRouteAnim();
-
-    const coords = js.route.coords;
-    document.getElementById("routeInfo").innerText =
-      `(${js.route.mode}) Distance ${js.route.distance_km} km • ETA ${fmtTime(js.route.travel_time_min)} • Delay ${fmtTime(js.route.traffic_delay_min)}`;
-
-    routeLine = L.polyline(coords, { weight: 6, opacity: 0.9 }).addTo(map);
-    map.fitBounds(routeLine.getBounds(), { padding:[20,20] });
-
-    carMarker = L.marker(coords[0], {
-      icon: L.divIcon({ className:"", html:`<div style="font-size:22px;">🚗</div>` })
-    }).addTo(map);
-
-    let i = 0;
-    carTimer = setInterval(()=>{
-      i++;
-      if(i >= coords.length){
-        clearInterval(carTimer); carTimer = null; return;
-      }
-      carMarker.setLatLng(coords[i]);
-    }, 55);
-
-    const turns = js.route.instructions || [];
-    if(turns.length){
-      const box = document.getElementById("turns");
-      box.style.display = "flex";
-      box.innerHTML = "";
-      turns.forEach(t=>{
-        const s = document.createElement("span");
-        s.className = "tag";
-        s.innerText = t.message || "—";
-        box.appendChild(s);
-      });
-    }
-  }
-
-  async function init(){
-    loadFavs();
-    await loadRecent();
-    await loadStats();
-  }
-  init();
-</script>
-</body>
-</html>
-"""
-    return render_template_string(html, TRAFFIC_TILE_URL=traffic_tile)
+@app.route("/tiles/<int:z>/<int:x>/<int:y>.png")
+def traffic_tile(z, x, y):
+    """Stream a TomTom traffic tile with a shared-cache friendly header."""
+    if not TOMTOM_API_KEY:
+        return ojsonify({"error": "Missing TOMTOM_API_KEY in env vars"}), 400
+    url = TOMTOM_TRAFFIC_TILE_URL.format(z=z, x=x, y=y, key=TOMTOM_API_KEY)
+    r = TOMTOM_SESS.get(url, stream=True, timeout=20)
+    return Response(
+        r.iter_content(64 * 1024),
+        status=r.status_code,
+        mimetype="image/png",
+        headers={"Cache-Control": "public, max-age=60, s-maxage=300"},
+    )
 
 
 # ---------------------------
@@ -2809,30 +2234,44 @@ def index():
 @app.route("/api/search")
 def api_search():
     if not TOMTOM_API_KEY or not OPENWEATHER_API_KEY:
-        return jsonify({"error": "Missing API keys. Set TOMTOM_API_KEY and OPENWEATHER_API_KEY in env vars."}), 400
+        return ojsonify({"error": "Missing API keys. Set TOMTOM_API_KEY and OPENWEATHER_API_KEY in env vars."}), 400
 
     query = (request.args.get("query") or "").strip()
     if not query:
-        return jsonify({"error": "query is required"}), 400
+        return ojsonify({"error": "query is required"}), 400
 
-    geo = tomtom_geocode(query)
+    # Near-duplicate spellings share one cache entry; ?no_cache=1 forces
+    # a fresh upstream geocode.
+    if request.args.get("no_cache") == "1":
+        geo = tomtom_geocode.__wrapped__(_norm_query(query))
+    else:
+        geo = tomtom_geocode(_norm_query(query))
     if not geo:
-        return jsonify({"error": "Location not found"}), 404
+        return ojsonify({"error": "Location not found"}), 404
 
     place, lat, lon = geo
-    weather = openweather_weather(lat, lon)
-    aqi = openweather_aqi_details(lat, lon)
-    traffic = tomtom_traffic(lat, lon)
-
-    save_to_db(query, place, lat, lon, weather, aqi.get("aqi_0_500"), traffic)
 
-    return jsonify(
+    # The three calls only need (lat, lon), so run them concurrently:
+    # total upstream wait becomes the slowest call instead of the sum.
+    # Coordinates are snapped to a ~100 m grid so nearby searches of the
+    # same place share cache entries.
+    clat, clon = round(lat, 3), round(lon, 3)
+    f_weather = _API_POOL.submit(openweather_weather, clat, clon)
+    f_aqi = _API_POOL.submit(openweather_aqi_details, clat, clon)
+    f_traffic = _API_POOL.submit(tomtom_traffic, clat, clon)
+    weather = f_weather.result()
+    aqi = f_aqi.result()
+    traffic = f_traffic.result()
+
+    save_to_db(query, place, lat, lon, weather, aqi.aqi_0_500, traffic)
+
+    return ojsonify(
         {
             "query": query,
             "place": place,
             "lat": lat,
             "lon": lon,
-            **weather,
+            **asdict(weather),
             "aqi": aqi,
             "traffic": traffic,
         }
@@ -2845,72 +2284,86 @@ def api_recent():
     limit = max(1, min(limit, 200))
     rows = fetch_recent(limit=limit)
 
-    for r in rows:
-        dt = r.get("created_at")
-        if dt is not None and dt.tzinfo is None:
-            dt = dt.replace(tzinfo=timezone.utc)
+    # History is append-only, so the newest created_at (plus the limit)
+    # pins the whole result set — cheaper than hashing the body.
+    newest = _iso_utc(rows[0].get("created_at")) if rows else "empty"
+    etag = f"{limit}-{newest}"
+    if _etag_matches(etag):
+        return "", 304
 
-        r["created_at"] = (
-            dt.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
-            if dt is not None else None
-        )
+    # Single pass: timestamps go out as UTC "Z" so the browser renders
+    # the same local time on Render and locally.
+    for r in rows:
+        r["created_at"] = _iso_utc(r.get("created_at"))
 
-    return jsonify({"rows": rows})
+    resp = ojsonify({"rows": rows})
+    resp.set_etag(etag)
+    return resp
 
 
 @app.route("/api/stats")
 def api_stats():
-    return jsonify(fetch_today_stats())
+    body = orjson.dumps(fetch_today_stats())
+    etag = hashlib.blake2b(body, digest_size=8).hexdigest()
+    if _etag_matches(etag):
+        return "", 304
+    resp = Response(body, mimetype="application/json")
+    resp.set_etag(etag)
+    return resp
 
 
 @app.route("/api/export")
 def api_export():
     limit = int(request.args.get("limit") or 200)
-    rows = fetch_recent(limit=limit)
-
-    buf = io.StringIO()
-    w = csv.writer(buf)
-    w.writerow(
-        [
-            "created_at",
-            "query_text",
-            "place_name",
-            "lat",
-            "lon",
-            "temperature_c",
-            "humidity_pct",
-            "wind_speed_ms",
-            "aqi_0_500",
-            "traffic_speed_kmh",
-        ]
-    )
-    for r in rows:
-        dt = r.get("created_at")
-        if dt is not None and dt.tzinfo is None:
-            dt = dt.replace(tzinfo=timezone.utc)
-        created_out = (
-            dt.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
-            if dt is not None else ""
-        )
 
+    def gen():
+        buf = io.StringIO()
+        w = csv.writer(buf)
         w.writerow(
             [
-                created_out,
-                r.get("query_text"),
-                r.get("place_name"),
-                r.get("lat"),
-                r.get("lon"),
-                r.get("temperature_c"),
-                r.get("humidity_pct"),
-                r.get("wind_speed_ms"),
-                r.get("aqi"),
-                r.get("traffic_speed_kmh"),
+                "created_at",
+                "query_text",
+                "place_name",
+                "lat",
+                "lon",
+                "temperature_c",
+                "humidity_pct",
+                "wind_speed_ms",
+                "aqi_0_500",
+                "traffic_speed_kmh",
             ]
         )
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+
+        init_db()
+        with db_conn() as conn:
+            # Named (server-side) cursor: rows stream from Postgres in
+            # chunks instead of materializing the whole export in memory.
+            with conn.cursor(name="export_cur") as cur:
+                cur.itersize = 1000
+                cur.execute(
+                    """
+                    SELECT created_at, query_text, place_name, lat, lon,
+                           temperature_c, humidity_pct, wind_speed_ms, aqi, traffic_speed_kmh
+                    FROM geo_search_history
+                    ORDER BY created_at DESC
+                    LIMIT %s
+                    """,
+                    (limit,),
+                )
+                for created_at, *rest in cur:
+                    w.writerow([_iso_utc(created_at) or "", *rest])
+                    if buf.tell() > 8192:
+                        yield buf.getvalue()
+                        buf.seek(0)
+                        buf.truncate()
+        if buf.tell():
+            yield buf.getvalue()
 
-    out = buf.getvalue()
     return Response(
-        out,
+        stream_with_context(gen()),
         mimetype="text/csv",
         headers={"Content-Disposition": 'attachment; filename="geo_history.csv"'},
     )
@@ -2919,57 +2372,59 @@ def api_export():
 @app.route("/api/suggest")
 def api_suggest():
     if not TOMTOM_API_KEY:
-        return jsonify({"error": "Missing TOMTOM_API_KEY in env vars"}), 400
+        return ojsonify({"error": "Missing TOMTOM_API_KEY in env vars"}), 400
     q = (request.args.get("q") or "").strip()
     if len(q) < 3:
-        return jsonify({"items": []})
+        return ojsonify({"items": []})
     try:
-        return jsonify({"items": tomtom_suggest(q, limit=6)})
+        return ojsonify({"items": tomtom_suggest(_norm_query(q), limit=6)})
     except Exception as e:
-        return jsonify({"items": [], "error": str(e)}), 500
+        return ojsonify({"items": [], "error": str(e)}), 500
 
 
 @app.route("/api/reverse")
 def api_reverse():
     if not TOMTOM_API_KEY:
-        return jsonify({"error": "Missing TOMTOM_API_KEY in env vars"}), 400
+        return ojsonify({"error": "Missing TOMTOM_API_KEY in env vars"}), 400
     try:
         lat = float(request.args.get("lat"))
         lon = float(request.args.get("lon"))
     except Exception:
-        return jsonify({"error": "lat/lon required"}), 400
+        return ojsonify({"error": "lat/lon required"}), 400
     try:
-        place = tomtom_reverse(lat, lon)
-        return jsonify({"place": place})
+        # Raw GPS fixes never repeat exactly; snap to ~100 m so repeat
+        # lookups from the same spot hit the cache.
+        place = tomtom_reverse(round(lat, 3), round(lon, 3))
+        return ojsonify({"place": place})
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return ojsonify({"error": str(e)}), 500
 
 
 @app.route("/api/route")
 def api_route():
     if not TOMTOM_API_KEY:
-        return jsonify({"error": "Missing TOMTOM_API_KEY in env vars"}), 400
+        return ojsonify({"error": "Missing TOMTOM_API_KEY in env vars"}), 400
 
     origin = (request.args.get("origin") or "").strip()
     destination = (request.args.get("destination") or "").strip()
     mode = (request.args.get("mode") or "fastest").strip()
 
     if not origin or not destination:
-        return jsonify({"error": "origin and destination are required"}), 400
+        return ojsonify({"error": "origin and destination are required"}), 400
 
-    o = tomtom_geocode_any(origin)
-    d = tomtom_geocode_any(destination)
+    o = tomtom_geocode_any(_norm_query(origin))
+    d = tomtom_geocode_any(_norm_query(destination))
     if not o:
-        return jsonify({"error": f"Origin not found: {origin}"}), 404
+        return ojsonify({"error": f"Origin not found: {origin}"}), 404
     if not d:
-        return jsonify({"error": f"Destination not found: {destination}"}), 404
+        return ojsonify({"error": f"Destination not found: {destination}"}), 404
 
     try:
         route = tomtom_route(o["lat"], o["lon"], d["lat"], d["lon"], mode=mode)
     except requests.HTTPError as e:
-        return jsonify({"error": f"Routing API error. Check TomTom key/plan. Details: {str(e)}"}), 502
+        return ojsonify({"error": f"Routing API error. Check TomTom key/plan. Details: {str(e)}"}), 502
 
-    return jsonify({"origin": o, "destination": d, "route": route})
+    return ojsonify({"origin": o, "destination": d, "route": route})
 
 
 if __name__ == "__main__":